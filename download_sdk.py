@@ -1,28 +1,34 @@
 import requests
 import zipfile
-import io
+import tempfile
 import os
 
+CHUNK_SIZE = 1 << 16  # 64KB
+
 def download_sdk():
     # GitHub API URL for the repository
     url = "https://api.github.com/repos/hyperliquid-dex/hyperliquid-python-sdk/zipball/main"
     
-    # 发送请求获取仓库内容
-    response = requests.get(url)
-    
-    if response.status_code == 200:
+    # 以流式方式发送请求，避免把整个压缩包读入内存
+    with requests.get(url, stream=True) as response:
+        if response.status_code != 200:
+            print(f"下载失败，状态码：{response.status_code}")
+            return False
+        
         # 创建临时目录
         os.makedirs("temp_sdk", exist_ok=True)
         
-        # 解压下载的内容
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zip_ref:
-            zip_ref.extractall("temp_sdk")
+        # 分块写入临时文件后直接从文件解压
+        with tempfile.TemporaryFile() as tmp:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                tmp.write(chunk)
+            tmp.seek(0)
             
-        print("SDK 下载成功！")
-        return True
-    else:
-        print(f"下载失败，状态码：{response.status_code}")
-        return False
+            with zipfile.ZipFile(tmp) as zip_ref:
+                zip_ref.extractall("temp_sdk")
+    
+    print("SDK 下载成功！")
+    return True
 
 if __name__ == "__main__":
     download_sdk() 
\ No newline at end of file
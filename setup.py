@@ -7,7 +7,10 @@ setup(
     install_requires=[
         "pandas",
         "numpy",
+        "numba",
+        "orjson",
         "aiohttp",
+        "yarl",
         "python-dotenv",
         "requests",
         "plotly",
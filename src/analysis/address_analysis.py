@@ -1,11 +1,104 @@
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
 import pandas as pd
 import numpy as np
+from numba import njit, prange
 
 logger = logging.getLogger(__name__)
 
+@njit(cache=True, boundscheck=False)
+def _mdd_kernel(profits):
+    """单次遍历计算逐笔盈亏的最大回撤，不分配中间数组
+    
+    回撤为累计盈亏相对此前峰值的下跌金额，与盈亏同单位
+    """
+    if profits.size == 0:
+        return 0.0
+    total = profits[0]
+    peak = total
+    mdd = 0.0
+    for i in range(1, profits.size):
+        total += profits[i]
+        if total > peak:
+            peak = total
+        drawdown = peak - total
+        if drawdown > mdd:
+            mdd = drawdown
+    return mdd
+
+@njit(parallel=True, cache=True, boundscheck=False)
+def _group_stats_kernel(values, starts, ends):
+    """并行计算每个分组 values[starts[g]:ends[g]] 的统计指标
+    
+    Returns:
+        (交易次数, 盈利次数, 亏损次数, 总盈利, 总亏损, 最大盈利, 最大亏损, 均值, 样本标准差, 最大回撤)
+    """
+    n_groups = starts.size
+    counts = np.zeros(n_groups, dtype=np.int64)
+    wins = np.zeros(n_groups, dtype=np.int64)
+    losses = np.zeros(n_groups, dtype=np.int64)
+    total_profit = np.zeros(n_groups)
+    total_loss = np.zeros(n_groups)
+    max_profit = np.zeros(n_groups)
+    max_loss = np.zeros(n_groups)
+    mean = np.zeros(n_groups)
+    std = np.zeros(n_groups)
+    mdd = np.zeros(n_groups)
+    
+    for g in prange(n_groups):
+        start = starts[g]
+        end = ends[g]
+        n = end - start
+        if n == 0:
+            continue
+        
+        total = 0.0
+        for i in range(start, end):
+            v = values[i]
+            total += v
+            if v > 0:
+                wins[g] += 1
+                total_profit[g] += v
+                if v > max_profit[g]:
+                    max_profit[g] = v
+            elif v < 0:
+                losses[g] += 1
+                total_loss[g] += v
+                if v < max_loss[g]:
+                    max_loss[g] = v
+        
+        counts[g] = n
+        mean[g] = total / n
+        if n > 1:
+            sq = 0.0
+            for i in range(start, end):
+                d = values[i] - mean[g]
+                sq += d * d
+            std[g] = np.sqrt(sq / (n - 1))
+        mdd[g] = _mdd_kernel(values[start:end])
+    
+    return counts, wins, losses, total_profit, total_loss, max_profit, max_loss, mean, std, mdd
+
+def _to_soa(trades: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """将交易记录列表一次性转换为按字段存储的数组
+    
+    盈利使用 float64 存储，汇总和最大/最小值直接作为结果输出，不引入舍入误差；
+    缺失或非有限（NaN、inf）的盈利按 0 处理
+    
+    Args:
+        trades: 交易记录列表
+        
+    Returns:
+        (盈利, 时间戳, 地址, 交易对) 四个等长数组
+    """
+    n = len(trades)
+    profit = np.fromiter((t.get('profit') or 0 for t in trades), dtype=np.float64, count=n)
+    profit[~np.isfinite(profit)] = 0
+    timestamp = np.fromiter((t.get('timestamp') or 0 for t in trades), dtype=np.int64, count=n)
+    address = np.array([t.get('address') for t in trades], dtype=object)
+    symbol = np.array([t.get('symbol') for t in trades], dtype=object)
+    return profit, timestamp, address, symbol
+
 class AddressAnalysis:
     """交易地址分析类"""
     
@@ -30,57 +123,93 @@ class AddressAnalysis:
                 logger.warning(f"未找到地址 {address} 的交易记录")
                 return {}
             
-            # 计算基本指标
-            total_trades = len(address_trades)
-            winning_trades = [t for t in address_trades if t.get('profit', 0) > 0]
-            losing_trades = [t for t in address_trades if t.get('profit', 0) < 0]
-            
-            win_rate = len(winning_trades) / total_trades if total_trades > 0 else 0
-            total_profit = sum(t.get('profit', 0) for t in winning_trades)
-            total_loss = sum(t.get('profit', 0) for t in losing_trades)
-            avg_profit = total_profit / len(winning_trades) if winning_trades else 0
-            avg_loss = total_loss / len(losing_trades) if losing_trades else 0
-            max_profit = max((t.get('profit', 0) for t in winning_trades), default=0)
-            max_loss = min((t.get('profit', 0) for t in losing_trades), default=0)
-            
-            # 计算盈亏比
-            profit_factor = abs(total_profit / total_loss) if total_loss != 0 else float('inf')
+            results = self._analyze_addresses(address_trades)
+            return results[0] if results else {}
             
-            # 计算夏普比率
-            returns = [t.get('profit', 0) for t in address_trades]
-            sharpe_ratio = self._calculate_sharpe_ratio(returns)
+        except Exception as e:
+            logger.error(f"分析地址 {address} 的交易时出错: {str(e)}")
+            return {}
+    
+    def _analyze_addresses(self, trades: List[Dict], min_trades: int = 0) -> List[Dict]:
+        """按地址一次性分组分析所有交易
+        
+        Args:
+            trades: 交易记录列表
+            min_trades: 最小交易次数要求
             
-            # 计算最大回撤
-            max_drawdown = self._calculate_max_drawdown(returns)
+        Returns:
+            每个地址的分析结果列表
+        """
+        profits, timestamps, addresses, symbols = _to_soa(trades)
+        
+        # 只保留有地址的交易
+        has_address = np.array([bool(a) for a in addresses], dtype=bool)
+        if not has_address.any():
+            return []
+        profits = profits[has_address]
+        timestamps = timestamps[has_address]
+        addresses = addresses[has_address]
+        symbols = symbols[has_address]
+        
+        # 按地址排序一次，每个地址对应排序后数组中的一段连续区间
+        codes, unique_addresses = pd.factorize(addresses, sort=False)
+        order = np.argsort(codes, kind='stable')
+        group_sizes = np.bincount(codes, minlength=len(unique_addresses))
+        offsets = np.concatenate(([0], np.cumsum(group_sizes)))
+        
+        selected = np.flatnonzero(group_sizes >= min_trades)
+        starts = offsets[selected]
+        ends = offsets[selected + 1]
+        
+        # 每笔交易所属的入选分组编号，未达到最小交易次数的为 -1
+        group_ids = np.full(len(unique_addresses), -1, dtype=np.int64)
+        group_ids[selected] = np.arange(selected.size)
+        row_groups = group_ids[codes]
+        time_distributions = self._analyze_time_distribution(timestamps, row_groups, selected.size)
+        symbol_distributions = self._analyze_symbol_distribution(symbols, profits, row_groups, selected.size)
+        
+        # 并行计算所有地址的统计指标
+        (counts, wins, losses, total_profits, total_losses,
+         max_profits, max_losses, means, stds, max_drawdowns) = _group_stats_kernel(
+            np.ascontiguousarray(profits[order]), starts, ends
+        )
+        sharpe_ratios = self._sharpe_from_moments(means, stds, counts)
+        
+        results = []
+        for g, group in enumerate(selected):
+            total_trades = int(counts[g])
+            winning_trades = int(wins[g])
+            losing_trades = int(losses[g])
+            total_profit = float(total_profits[g])
+            total_loss = float(total_losses[g])
             
-            # 分析时间分布
-            time_distribution = self._analyze_time_distribution(address_trades)
+            win_rate = winning_trades / total_trades if total_trades > 0 else 0
+            avg_profit = total_profit / winning_trades if winning_trades else 0
+            avg_loss = total_loss / losing_trades if losing_trades else 0
             
-            # 分析交易对分布
-            symbol_distribution = self._analyze_symbol_distribution(address_trades)
+            # 计算盈亏比
+            profit_factor = abs(total_profit / total_loss) if total_loss != 0 else float('inf')
             
-            return {
-                'address': address,
+            results.append({
+                'address': unique_addresses[group],
                 'total_trades': total_trades,
                 'win_rate': win_rate,
                 'total_profit': total_profit,
                 'total_loss': total_loss,
                 'avg_profit': avg_profit,
                 'avg_loss': avg_loss,
-                'max_profit': max_profit,
-                'max_loss': max_loss,
+                'max_profit': float(max_profits[g]),
+                'max_loss': float(max_losses[g]),
                 'profit_factor': profit_factor,
-                'sharpe_ratio': sharpe_ratio,
-                'max_drawdown': max_drawdown,
-                'time_distribution': time_distribution,
-                'symbol_distribution': symbol_distribution
-            }
-            
-        except Exception as e:
-            logger.error(f"分析地址 {address} 的交易时出错: {str(e)}")
-            return {}
+                'sharpe_ratio': float(sharpe_ratios[g]),
+                'max_drawdown': float(max_drawdowns[g]),
+                'time_distribution': time_distributions[g],
+                'symbol_distribution': symbol_distributions[g]
+            })
+        
+        return results
     
-    def _calculate_sharpe_ratio(self, returns: List[float], risk_free_rate: float = 0.02) -> float:
+    def _calculate_sharpe_ratio(self, returns: Union[List[float], np.ndarray], risk_free_rate: float = 0.02) -> float:
         """计算夏普比率
         
         Args:
@@ -90,103 +219,116 @@ class AddressAnalysis:
         Returns:
             夏普比率
         """
-        if not returns:
+        r = np.asarray(returns, dtype=np.float64)
+        if r.size < 2:
             return 0.0
         
-        returns = np.array(returns)
-        excess_returns = returns - risk_free_rate/252  # 转换为日化收益率
+        return float(self._sharpe_from_moments(r.mean(), r.std(ddof=1), r.size, risk_free_rate))
+    
+    @staticmethod
+    def _sharpe_from_moments(mean, std, count, risk_free_rate: float = 0.02):
+        """根据均值、样本标准差和样本数计算夏普比率，支持标量或数组输入
         
-        if len(excess_returns) < 2:
-            return 0.0
+        Args:
+            mean: 收益率均值
+            std: 收益率样本标准差（ddof=1）
+            count: 样本数
+            risk_free_rate: 无风险利率
             
-        return np.mean(excess_returns) / np.std(excess_returns) * np.sqrt(252)
+        Returns:
+            夏普比率，样本数不足 2 或标准差为 0 时为 0
+        """
+        mean = np.asarray(mean, dtype=np.float64)
+        std = np.asarray(std, dtype=np.float64)
+        valid = (np.asarray(count) >= 2) & (std > 0)
+        excess_mean = mean - risk_free_rate/252  # 转换为日化收益率
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = excess_mean / std * np.sqrt(252)
+        return np.where(valid, sharpe, 0.0)
     
-    def _calculate_max_drawdown(self, returns: List[float]) -> float:
+    def _calculate_max_drawdown(self, profits: Union[List[float], np.ndarray]) -> float:
         """计算最大回撤
         
+        以逐笔盈亏的累计和作为资金曲线，回撤为相对历史峰值的下跌金额
+        
         Args:
-            returns: 收益率列表
+            profits: 逐笔盈亏列表
             
         Returns:
-            最大回撤
+            最大回撤（与盈亏同单位）
         """
-        if not returns:
+        r = np.ascontiguousarray(profits, dtype=np.float64)
+        if r.size == 0:
             return 0.0
             
-        cumulative = np.cumsum(returns)
-        running_max = np.maximum.accumulate(cumulative)
-        drawdown = running_max - cumulative
-        return np.max(drawdown) if len(drawdown) > 0 else 0.0
+        return float(_mdd_kernel(r))
     
-    def _analyze_time_distribution(self, trades: List[Dict]) -> Dict:
-        """分析交易时间分布
+    def _analyze_time_distribution(self, timestamps: np.ndarray, group_ids: np.ndarray, n_groups: int) -> List[Dict]:
+        """一次性分析所有分组的交易时间分布
         
         Args:
-            trades: 交易记录列表
+            timestamps: 交易时间戳（毫秒）数组
+            group_ids: 每笔交易所属的分组编号，-1 表示不参与统计
+            n_groups: 分组数量
             
         Returns:
-            时间分布分析结果
+            每个分组的时间分布分析结果（小时按 UTC 计算）
         """
         try:
-            # 提取交易时间
-            timestamps = [datetime.fromtimestamp(t.get('timestamp', 0)/1000) for t in trades]
-            hours = [t.hour for t in timestamps]
+            ts = np.asarray(timestamps, dtype=np.int64)
+            group_ids = np.asarray(group_ids, dtype=np.int64)
+            keep = group_ids >= 0
             
-            # 统计每个小时的交易次数
-            hour_counts = pd.Series(hours).value_counts()
-            most_active_hour = hour_counts.index[0] if not hour_counts.empty else None
+            # 按 (分组, 小时) 统计交易次数
+            hours = pd.to_datetime(ts[keep], unit='ms').hour.to_numpy()
+            hour_counts = np.bincount(
+                group_ids[keep] * 24 + hours, minlength=n_groups * 24
+            ).reshape(n_groups, 24)
+            most_active_hours = hour_counts.argmax(axis=1)
+            has_trades = hour_counts.any(axis=1)
             
-            return {
-                'most_active_hour': most_active_hour
-            }
+            return [
+                {'most_active_hour': int(hour) if active else None}
+                for hour, active in zip(most_active_hours, has_trades)
+            ]
             
         except Exception as e:
             logger.error(f"分析时间分布时出错: {str(e)}")
-            return {}
+            return [{} for _ in range(n_groups)]
     
-    def _analyze_symbol_distribution(self, trades: List[Dict]) -> Dict:
-        """分析交易对分布
+    def _analyze_symbol_distribution(self, symbols: np.ndarray, profits: np.ndarray, group_ids: np.ndarray, n_groups: int) -> List[Dict]:
+        """一次性分析所有分组的交易对分布
         
         Args:
-            trades: 交易记录列表
+            symbols: 每笔交易的交易对
+            profits: 每笔交易的盈利
+            group_ids: 每笔交易所属的分组编号，-1 表示不参与统计
+            n_groups: 分组数量
             
         Returns:
-            交易对分布分析结果
+            每个分组的交易对分布分析结果
         """
+        results = [{} for _ in range(n_groups)]
         try:
-            # 统计每个交易对的交易次数和盈利
-            symbol_stats = {}
-            for trade in trades:
-                symbol = trade.get('symbol')
-                if not symbol:
-                    continue
-                    
-                if symbol not in symbol_stats:
-                    symbol_stats[symbol] = {
-                        'count': 0,
-                        'profit': 0
-                    }
-                    
-                symbol_stats[symbol]['count'] += 1
-                symbol_stats[symbol]['profit'] += trade.get('profit', 0)
-            
-            if not symbol_stats:
-                return {}
-            
-            # 找出交易次数最多的交易对
-            most_traded = max(symbol_stats.items(), key=lambda x: x[1]['count'])
+            df = pd.DataFrame({'group': group_ids, 'symbol': symbols, 'profit': profits})
+            df = df[(df['group'] >= 0) & df['symbol'].notna() & (df['symbol'] != '')]
+            if df.empty:
+                return results
             
-            # 找出盈利最多的交易对
-            most_profitable = max(symbol_stats.items(), key=lambda x: x[1]['profit'])
+            # 统计每个 (分组, 交易对) 的交易次数和盈利
+            symbol_stats = df.groupby(['group', 'symbol'], sort=False)['profit'].agg(count='size', profit='sum')
+            most_traded = symbol_stats['count'].groupby(level='group', sort=False).idxmax()
+            most_profitable = symbol_stats['profit'].groupby(level='group', sort=False).idxmax()
             
-            return {
-                'most_traded_symbol': most_traded[0],
-                'most_profitable_symbol': most_profitable[0]
-            }
+            for group, (_, symbol) in most_traded.items():
+                results[group]['most_traded_symbol'] = symbol
+            for group, (_, symbol) in most_profitable.items():
+                results[group]['most_profitable_symbol'] = symbol
+            return results
             
         except Exception as e:
             logger.error(f"分析交易对分布时出错: {str(e)}")
-            return {}
+            return [{} for _ in range(n_groups)]
     
     def find_top_traders(self, trades: List[Dict], min_trades: int = 10) -> List[Dict]:
         """找出表现最好的交易地址
@@ -199,15 +341,8 @@ class AddressAnalysis:
             按夏普比率排序的交易地址列表
         """
         try:
-            # 获取所有唯一的交易地址
-            addresses = set(t.get('address') for t in trades if t.get('address'))
-            
-            # 分析每个地址
-            trader_results = []
-            for address in addresses:
-                result = self.analyze_trades(trades, address)
-                if result and result['total_trades'] >= min_trades:
-                    trader_results.append(result)
+            # 一次分组分析所有地址
+            trader_results = self._analyze_addresses(trades, min_trades)
             
             # 按夏普比率排序
             trader_results.sort(key=lambda x: x['sharpe_ratio'], reverse=True)
@@ -216,4 +351,11 @@ class AddressAnalysis:
             
         except Exception as e:
             logger.error(f"查找顶级交易者时出错: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+
+# 预热 numba 内核：首次导入时编译（或从磁盘缓存加载），避免第一次分析时的编译延迟
+try:
+    _mdd_kernel(np.zeros(1, dtype=np.float64))
+    _group_stats_kernel(np.zeros(1, dtype=np.float64), np.zeros(1, dtype=np.int64), np.ones(1, dtype=np.int64))
+except Exception as e:
+    logger.warning(f"预热 numba 内核失败: {str(e)}")
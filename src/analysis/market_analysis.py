@@ -1,25 +1,62 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
+from numba import njit
 from api.backpack_client import BackpackClient
 
 logger = logging.getLogger(__name__)
 
+MS_PER_YEAR = 365 * 24 * 60 * 60 * 1000  # 加密货币全年无休，按 365 天折算
+
+@njit(cache=True, boundscheck=False)
+def _wilder_averages(close, period):
+    """按 Wilder 平滑计算最后一期的平均涨幅和平均跌幅
+    
+    前 period 个价格变化取简单平均作为初值，之后按
+    avg = (prev * (period - 1) + current) / period 递推
+    """
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+    
+    for i in range(period + 1, close.size):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return avg_gain, avg_loss
+
 class MarketAnalysis:
     """市场分析类"""
     
-    def __init__(self, client: BackpackClient):
+    def __init__(self, client: BackpackClient, cache_ttl: float = 30, cache_size: int = 512):
         """初始化分析器
         
         Args:
             client: Backpack API 客户端
+            cache_ttl: 市场分析结果的缓存时间（秒）
+            cache_size: 最多缓存的市场数量
         """
         self.client = client
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, Tuple[float, Dict]] = OrderedDict()
     
     async def analyze_market(self, symbol: str) -> Dict:
-        """分析市场状态
+        """分析市场状态，缓存时间内重复请求同一市场直接返回缓存结果
         
         Args:
             symbol: 交易对符号
@@ -30,6 +67,22 @@ class MarketAnalysis:
             - trade_analysis: 交易分析
             - price_analysis: 价格分析
         """
+        now = time.monotonic()
+        cached = self._cache.get(symbol)
+        if cached and cached[0] > now:
+            self._cache.move_to_end(symbol)
+            return cached[1]
+        
+        analysis = await self._analyze_market(symbol)
+        if analysis:
+            self._cache[symbol] = (now + self.cache_ttl, analysis)
+            self._cache.move_to_end(symbol)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return analysis
+    
+    async def _analyze_market(self, symbol: str) -> Dict:
+        """分析市场状态（不使用缓存）"""
         try:
             # 1. 分析市场深度
             depth_analysis = await self.client.analyze_market_depth(symbol)
@@ -67,7 +120,7 @@ class MarketAnalysis:
             - avg_trade_value: 平均成交额
             - buy_ratio: 买单比例
             - price_trend: 价格趋势（1: 上涨, 0: 横盘, -1: 下跌）
-            - volatility: 波动率
+            - volatility: 年化波动率，缺少成交时间戳时为 NaN
         """
         try:
             if not trades:
@@ -75,23 +128,24 @@ class MarketAnalysis:
             
             # 转换为 DataFrame
             df = pd.DataFrame(trades)
-            df['price'] = df['price'].astype(float)
-            df['quantity'] = df['quantity'].astype(float)
-            df['quoteQuantity'] = df['quoteQuantity'].astype(float)
+            price = df['price'].to_numpy(dtype=np.float64)
+            quantity = df['quantity'].to_numpy(dtype=np.float64)
+            quote_quantity = df['quoteQuantity'].to_numpy(dtype=np.float64)
             
             # 计算基本指标
             total_trades = len(df)
-            total_volume = df['quantity'].sum()
-            total_value = df['quoteQuantity'].sum()
+            total_volume = quantity.sum()
+            total_value = quote_quantity.sum()
             avg_trade_size = total_volume / total_trades
             avg_trade_value = total_value / total_trades
             
             # 计算买单比例
-            buy_ratio = len(df[~df['isBuyerMaker']]) / total_trades
+            maker_mask = df['isBuyerMaker'].to_numpy(dtype=bool)
+            buy_ratio = (total_trades - maker_mask.sum()) / total_trades
             
             # 计算价格趋势
-            first_price = df.iloc[-1]['price']  # 最早的价格
-            last_price = df.iloc[0]['price']   # 最新的价格
+            first_price = price[-1]  # 最早的价格
+            last_price = price[0]    # 最新的价格
             price_change = (last_price - first_price) / first_price
             
             if price_change > 0.001:  # 0.1% 的阈值
@@ -101,9 +155,16 @@ class MarketAnalysis:
             else:
                 price_trend = 0
             
-            # 计算波动率
-            returns = df['price'].pct_change()
-            volatility = returns.std() * np.sqrt(len(df))  # 年化波动率
+            # 计算波动率：逐笔收益率的样本标准差，按成交频率折算为年化波动率；
+            # 缺少时间戳或时间跨度为 0 时无法年化，返回 NaN
+            prices = price[::-1]  # 按时间先后排列
+            returns = np.diff(prices) / prices[:-1]
+            volatility = np.nan
+            if returns.size >= 2 and 'timestamp' in df.columns:
+                timestamps = df['timestamp'].to_numpy()
+                span_ms = timestamps.max() - timestamps.min()
+                if span_ms > 0:
+                    volatility = returns.std(ddof=1) * np.sqrt(returns.size * MS_PER_YEAR / span_ms)
             
             return {
                 'total_trades': total_trades,
@@ -144,34 +205,33 @@ class MarketAnalysis:
                 return {}
             
             # 转换为 DataFrame
-            df = pd.DataFrame(klines, columns=[
+            raw = pd.DataFrame(klines, columns=[
                 'openTime', 'open', 'high', 'low', 'close', 'volume',
                 'closeTime', 'quoteVolume', 'trades'
             ])
             
-            # 转换数据类型
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
+            # 一次性转换为连续的 float64 数据块，各列取其视图
+            prices = raw[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+            high = prices[:, 1]
+            low = prices[:, 2]
+            close = prices[:, 3]
+            volume = prices[:, 4]
             
             # 计算基本指标
-            current_price = float(df.iloc[-1]['close'])
-            price_24h_ago = float(df.iloc[0]['close'])
+            current_price = float(close[-1])
+            price_24h_ago = float(close[0])
             price_change_24h = current_price - price_24h_ago
             price_change_percentage_24h = (price_change_24h / price_24h_ago) * 100
-            high_24h = df['high'].max()
-            low_24h = df['low'].min()
-            volume_24h = df['volume'].sum()
+            high_24h = high.max()
+            low_24h = low.min()
+            volume_24h = volume.sum()
             
-            # 计算移动平均线
-            ma7 = df['close'].rolling(window=7).mean().iloc[-1]
-            ma25 = df['close'].rolling(window=25).mean().iloc[-1]
+            # 计算移动平均线，只需最后一个窗口的均值，数据不足时为 NaN
+            ma7 = close[-7:].mean() if close.size >= 7 else np.nan
+            ma25 = close[-25:].mean() if close.size >= 25 else np.nan
             
             # 计算RSI
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs.iloc[-1]))
+            rsi = self._calculate_rsi(close)
             
             # 判断趋势
             if current_price > ma7 and ma7 > ma25 and rsi > 70:
@@ -202,12 +262,34 @@ class MarketAnalysis:
             logger.error(f"分析价格数据失败: {str(e)}")
             return {}
     
-    async def find_active_markets(self, min_trades: int = 100, min_volume: float = 1000) -> List[Dict]:
+    def _calculate_rsi(self, close: np.ndarray, period: int = 14) -> float:
+        """计算 Wilder RSI
+        
+        Args:
+            close: 收盘价序列
+            period: RSI 周期
+            
+        Returns:
+            最后一期的 RSI，数据不足时为 NaN
+        """
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        if close.size <= period:
+            return np.nan
+        
+        avg_gain, avg_loss = _wilder_averages(close, period)
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else np.nan
+        
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+    
+    async def find_active_markets(self, min_trades: int = 100, min_volume: float = 1000, max_concurrency: int = 10) -> List[Dict]:
         """查找活跃的市场
         
         Args:
             min_trades: 最小成交笔数
             min_volume: 最小成交量（以USDC计价）
+            max_concurrency: 同时分析的市场数量上限
             
         Returns:
             活跃市场列表，每个市场包含：
@@ -218,15 +300,19 @@ class MarketAnalysis:
             # 1. 获取所有市场
             markets = await self.client.get_markets()
             
-            # 2. 分析每个市场
+            # 2. 并发分析每个市场，用信号量限制同时进行的请求数
+            semaphore = asyncio.Semaphore(max_concurrency)
+            
+            async def analyze(symbol: str):
+                async with semaphore:
+                    return symbol, await self.analyze_market(symbol)
+            
+            results = await asyncio.gather(*(
+                analyze(market['symbol']) for market in markets if market.get('symbol')
+            ))
+            
             active_markets = []
-            for market in markets:
-                symbol = market.get('symbol')
-                if not symbol:
-                    continue
-                
-                # 分析市场
-                analysis = await self.analyze_market(symbol)
+            for symbol, analysis in results:
                 if not analysis:
                     continue
                 
@@ -249,4 +335,10 @@ class MarketAnalysis:
             
         except Exception as e:
             logger.error(f"查找活跃市场失败: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+
+# 预热 numba 内核：首次导入时编译（或从磁盘缓存加载），避免第一次分析时的编译延迟
+try:
+    _wilder_averages(np.ones(20, dtype=np.float64), 14)
+except Exception as e:
+    logger.warning(f"预热 numba 内核失败: {str(e)}")
@@ -44,14 +44,15 @@ class TraderAnalysis:
 
     def calculate_statistics(self, df: pd.DataFrame) -> Dict:
         """计算统计数据"""
+        stats = df[['win_rate', 'return_rate', 'max_drawdown']].agg(['mean', 'max', 'min'])
         return {
             "total_traders": len(df),
-            "avg_win_rate": df['win_rate'].mean(),
-            "avg_return_rate": df['return_rate'].mean(),
-            "avg_max_drawdown": df['max_drawdown'].mean(),
-            "top_return_rate": df['return_rate'].max(),
-            "top_win_rate": df['win_rate'].max(),
-            "min_max_drawdown": df['max_drawdown'].min()
+            "avg_win_rate": stats.at['mean', 'win_rate'],
+            "avg_return_rate": stats.at['mean', 'return_rate'],
+            "avg_max_drawdown": stats.at['mean', 'max_drawdown'],
+            "top_return_rate": stats.at['max', 'return_rate'],
+            "top_win_rate": stats.at['max', 'win_rate'],
+            "min_max_drawdown": stats.at['min', 'max_drawdown']
         }
 
     def get_top_traders(self, df: pd.DataFrame, metric: str = 'return_rate', top_n: int = 10) -> pd.DataFrame:
@@ -86,15 +87,16 @@ class TraderAnalysis:
             
             # 根据 Backpack API 的数据格式计算盈亏
             # 使用 quantity 和 price 字段
-            df['value'] = df['price'].astype(float) * df['quantity'].astype(float)
+            price = pd.to_numeric(df['price']).to_numpy(dtype=np.float64)
+            quantity = pd.to_numeric(df['quantity']).to_numpy(dtype=np.float64)
+            value = price * quantity
+            df['value'] = value
             
             # 使用 isBuyerMaker 判断买卖方向
-            df['profit'] = df.apply(lambda x: 
-                float(x['value']) if not x['isBuyerMaker'] else -float(x['value']), 
-                axis=1
-            )
+            mask = df['isBuyerMaker'].to_numpy(dtype=bool)
+            df['profit'] = np.where(mask, -value, value)
             
-            profitable_trades = len(df[df['profit'] > 0])
+            profitable_trades = int((df['profit'] > 0).sum())
             win_rate = profitable_trades / total_trades if total_trades > 0 else 0
             
             # 计算盈亏统计
@@ -1,64 +1,173 @@
+import asyncio
+import hashlib
+import hmac
 import logging
 import time
 import aiohttp
-from typing import Dict, List, Optional, Tuple
+import numpy as np
+import orjson
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-import requests
+from yarl import URL
+from .connector import create_connector
+from .rate_limiter import AsyncTokenBucket
+
+RATE_LIMIT_COOLDOWN = 5  # 被服务端限流后额外等待的秒数
+MS_PER_DAY = 24 * 60 * 60 * 1000
+LARGE_BODY_SIZE = 1024 * 1024  # 超过该大小的响应在线程中解析
+WS_URL = "wss://ws.backpack.exchange"
+ENDPOINTS = {
+    'markets': 'api/v1/markets',
+    'trades': 'api/v1/trades',
+    'klines': 'api/v1/klines',
+    'depth': 'api/v1/depth'
+}
 
 class BackpackClient:
     """Backpack API 客户端"""
     
-    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None, connector: Optional[aiohttp.TCPConnector] = None, max_concurrency: int = 32, markets_ttl: float = 60):
         """初始化BackpackClient
         
         Args:
             api_key: API密钥
             api_secret: API密钥对应的secret
+            connector: 共享的连接池，不传时在首次请求时创建自有连接池
+            max_concurrency: 同时进行的请求数量上限
+            markets_ttl: 市场列表的缓存时间（秒）
         """
         self.base_url = "https://api.backpack.exchange"
+        self.ws_url = WS_URL
         self.api_key = api_key
         self.api_secret = api_secret
         self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector = connector
+        # 预先编码签名密钥，避免每次签名重复编码
+        self._sig_key = api_secret.encode() if api_secret else None
+        
+        # API 限制：每分钟 2000 次请求
+        self._rate_limiter = AsyncTokenBucket.per_minute(2000)
+        # 所有调用方共用的并发上限，令牌桶负责总体速率
+        self._semaphore = asyncio.Semaphore(max_concurrency)
         
-        if api_key and api_secret:
-            self.session.headers.update({
-                'X-API-Key': api_key,
-                'X-Timestamp': str(int(time.time() * 1000)),
-                'X-Signature': self._generate_signature()
-            })
+        # 市场列表很少变化，缓存一段时间内的结果：(过期时间, 数据)
+        self.markets_ttl = markets_ttl
+        self._markets_cache: Optional[Tuple[float, List[Dict]]] = None
+    
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+    
+    @base_url.setter
+    def base_url(self, value: str):
+        """设置 API 地址，同时预先解析各接口的 URL，请求时不再重复拼接和解析"""
+        self._base_url = value
+        base = URL(value)
+        self._urls = {name: base / path for name, path in ENDPOINTS.items()}
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 HTTP 会话，首次使用时创建，之后复用连接池和 keep-alive 连接"""
+        if self._session is None or self._session.closed:
+            # 外部传入的连接池由调用方负责关闭
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=self._connector or create_connector(),
+                connector_owner=self._connector is None
+            )
+        return self._session
+    
+    async def close(self):
+        """关闭共享的 HTTP 会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _sign(self, ts: int) -> str:
+        """用 API secret 对时间戳做 HMAC-SHA256 签名
         
-        # API 限制
-        self.rate_limit = {
-            'requests_per_minute': 2000,
-            'last_request_time': 0
+        Args:
+            ts: 毫秒时间戳
+            
+        Returns:
+            str: 十六进制签名
+        """
+        return hmac.new(self._sig_key, str(ts).encode(), hashlib.sha256).hexdigest()
+    
+    def _auth_headers(self) -> Optional[Dict[str, str]]:
+        """构造认证请求头，未配置密钥时返回 None"""
+        if not (self.api_key and self._sig_key):
+            return None
+        ts = int(time.time() * 1000)
+        return {
+            'X-API-Key': self.api_key,
+            'X-Timestamp': str(ts),
+            'X-Signature': self._sign(ts)
         }
     
-    def _check_rate_limit(self):
-        """检查并等待直到可以发送下一个请求"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.rate_limit['last_request_time']
+    @asynccontextmanager
+    async def _request(self, url: Union[str, URL], **kwargs):
+        """在并发上限和速率限制内发送 GET 请求
         
-        # 计算需要等待的时间（毫秒）
-        wait_time = max(0, (60 / self.rate_limit['requests_per_minute']) - time_since_last_request)
-        if wait_time > 0:
-            time.sleep(wait_time)
+        Args:
+            url: 请求地址
+            **kwargs: 传给 session.get 的参数
+            
+        Yields:
+            aiohttp.ClientResponse: 响应对象
+        """
+        async with self._semaphore:
+            await self._rate_limiter.acquire()
+            session = await self._get_session()
+            async with session.get(url, **kwargs) as response:
+                yield response
+    
+    async def _read_json(self, response: aiohttp.ClientResponse):
+        """读取响应并解析 JSON
         
-        self.rate_limit['last_request_time'] = time.time()
+        大响应（如多周期K线）在线程中解析，避免阻塞事件循环
+        
+        Args:
+            response: 响应对象
+            
+        Returns:
+            解析后的数据
+        """
+        body = await response.read()
+        if len(body) > LARGE_BODY_SIZE:
+            return await asyncio.to_thread(orjson.loads, body)
+        return orjson.loads(body)
+    
+    def _handle_rate_limited(self, status: int):
+        """收到 HTTP 429 时让令牌桶冷却，避免继续触发服务端限流"""
+        if status == 429:
+            self._rate_limiter.penalize(RATE_LIMIT_COOLDOWN)
     
     async def get_markets(self) -> List[Dict]:
-        """获取所有市场信息"""
+        """获取所有市场信息，缓存时间内重复调用直接返回缓存结果"""
+        now = time.monotonic()
+        if self._markets_cache and self._markets_cache[0] > now:
+            return self._markets_cache[1]
+        
         try:
-            self._check_rate_limit()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/api/v1/markets") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        self.logger.info(f"获取到 {len(data)} 个市场")
-                        return data
-                    else:
-                        self.logger.error(f"获取市场信息失败: {response.status}")
-                        return []
+            async with self._request(self._urls['markets']) as response:
+                if response.status == 200:
+                    data = await self._read_json(response)
+                    self.logger.info(f"获取到 {len(data)} 个市场")
+                    if data:
+                        self._markets_cache = (now + self.markets_ttl, data)
+                    return data
+                else:
+                    self._handle_rate_limited(response.status)
+                    self.logger.error(f"获取市场信息失败: {response.status}")
+                    return []
         except Exception as e:
             self.logger.error(f"获取市场信息失败: {str(e)}")
             return []
@@ -80,19 +189,18 @@ class BackpackClient:
             - isBuyerMaker: 买方是否为maker
         """
         try:
-            self._check_rate_limit()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/api/v1/trades",
-                    params={"symbol": symbol, "limit": limit}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        self.logger.info(f"获取到 {len(data)} 条交易记录")
-                        return data
-                    else:
-                        self.logger.error(f"获取交易历史失败: {response.status}")
-                        return []
+            async with self._request(
+                self._urls['trades'],
+                params={"symbol": symbol, "limit": limit}
+            ) as response:
+                if response.status == 200:
+                    data = await self._read_json(response)
+                    self.logger.info(f"获取到 {len(data)} 条交易记录")
+                    return data
+                else:
+                    self._handle_rate_limited(response.status)
+                    self.logger.error(f"获取交易历史失败: {response.status}")
+                    return []
         except Exception as e:
             self.logger.error(f"获取交易历史失败: {str(e)}")
             return []
@@ -116,68 +224,56 @@ class BackpackClient:
             'limit': limit
         }
         
-        # 获取当前时间戳（毫秒）
+        # 结束时间不晚于当前时间；未提供开始时间或开始时间不早于结束时间时，取结束时间前24小时
         current_time = int(time.time() * 1000)
+        end_time = current_time if end_time is None else min(end_time, current_time)
+        if start_time is None or start_time >= end_time:
+            start_time = end_time - MS_PER_DAY
         
-        # 如果没有提供时间参数，使用当前时间的前24小时
-        if start_time is None:
-            start_time = current_time - (24 * 60 * 60 * 1000)  # 24小时前
-        if end_time is None:
-            end_time = current_time
-            
-        # 确保时间戳在合理范围内
-        if start_time > current_time:
-            start_time = current_time - (24 * 60 * 60 * 1000)
-        if end_time > current_time:
-            end_time = current_time
-            
-        # 确保开始时间不大于结束时间
-        if start_time >= end_time:
-            start_time = end_time - (24 * 60 * 60 * 1000)
-            
-        # 确保时间戳不是未来时间
-        if start_time > current_time:
-            start_time = current_time - (24 * 60 * 60 * 1000)
-        if end_time > current_time:
-            end_time = current_time
-            
-        # 将时间戳转换为UTC时间
-        start_time = start_time - (8 * 60 * 60 * 1000)  # 减去8小时
-        end_time = end_time - (8 * 60 * 60 * 1000)  # 减去8小时
-            
         params['startTime'] = start_time
         params['endTime'] = end_time
             
         self.logger.info(f'请求K线数据参数: {params}')
         
         try:
-            headers = {}
-            if self.api_key and self.api_secret:
-                timestamp = str(int(time.time() * 1000))
-                headers = {
-                    'X-API-Key': self.api_key,
-                    'X-Timestamp': timestamp,
-                    'X-Signature': self._generate_signature()
-                }
+            headers = self._auth_headers() if self.api_key else None
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/api/v1/klines",
-                    params=params,
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        self.logger.info(f"获取到 {len(data)} 条K线数据")
-                        return data
-                    else:
-                        error_text = await response.text()
-                        self.logger.error(f"获取K线数据失败: {response.status}, {error_text}")
-                        return []
+            async with self._request(
+                self._urls['klines'],
+                params=params,
+                headers=headers
+            ) as response:
+                if response.status == 200:
+                    data = await self._read_json(response)
+                    self.logger.info(f"获取到 {len(data)} 条K线数据")
+                    return data
+                else:
+                    self._handle_rate_limited(response.status)
+                    error_text = await response.text()
+                    self.logger.error(f"获取K线数据失败: {response.status}, {error_text}")
+                    return []
         except Exception as e:
             self.logger.error(f"获取K线数据失败: {str(e)}")
             return []
     
+    async def get_klines_multi(self, symbol: str, intervals: List[str], limit: int = 24) -> Dict[str, List[Dict]]:
+        """并发获取同一交易对多个间隔的K线数据
+        
+        各请求共用连接池中的 keep-alive 连接，同时受并发上限和速率限制约束
+        
+        Args:
+            symbol: 交易对
+            intervals: K线间隔列表
+            limit: 每个间隔返回的K线数量
+            
+        Returns:
+            K线间隔到K线数据列表的映射
+        """
+        results = await asyncio.gather(
+            *(self.get_klines(symbol, interval=interval, limit=limit) for interval in intervals)
+        )
+        return dict(zip(intervals, results))
+    
     async def get_orderbook(self, symbol: str, limit: Optional[int] = None) -> Dict[str, List[List[str]]]:
         """获取订单簿数据
         
@@ -191,27 +287,44 @@ class BackpackClient:
             - asks: 卖单列表，每个元素为 [价格, 数量]
         """
         try:
-            self._check_rate_limit()
             params = {"symbol": symbol}
             if limit is not None:
                 params["limit"] = limit
                 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/api/v1/depth",
-                    params=params
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        self.logger.info(f"获取到订单簿数据: {len(data.get('bids', []))} 个买单, {len(data.get('asks', []))} 个卖单")
-                        return data
-                    else:
-                        self.logger.error(f"获取订单簿数据失败: {response.status}")
-                        return {"bids": [], "asks": []}
+            async with self._request(
+                self._urls['depth'],
+                params=params
+            ) as response:
+                if response.status == 200:
+                    data = await self._read_json(response)
+                    self.logger.info(f"获取到订单簿数据: {len(data.get('bids', []))} 个买单, {len(data.get('asks', []))} 个卖单")
+                    return data
+                else:
+                    self._handle_rate_limited(response.status)
+                    self.logger.error(f"获取订单簿数据失败: {response.status}")
+                    return {"bids": [], "asks": []}
         except Exception as e:
             self.logger.error(f"获取订单簿数据失败: {str(e)}")
             return {"bids": [], "asks": []}
     
+    async def get_orderbook_np(self, symbol: str, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """获取订单簿数据并转换为 numpy 数组
+        
+        Args:
+            symbol: 交易对符号
+            limit: 返回的档位数量
+            
+        Returns:
+            订单簿数据，包含：
+            - bids: 买单数组，形状为 (N, 2)，列依次为价格和数量
+            - asks: 卖单数组，形状为 (N, 2)，列依次为价格和数量
+        """
+        orderbook = await self.get_orderbook(symbol, limit)
+        return {
+            side: np.array(orderbook.get(side, []), dtype=np.float64).reshape(-1, 2)
+            for side in ('bids', 'asks')
+        }
+    
     async def analyze_market_depth(self, symbol: str, depth: int = 20) -> Dict:
         """分析市场深度
         
@@ -231,20 +344,22 @@ class BackpackClient:
             - imbalance: 买卖失衡程度 (-1 到 1，负值表示卖压更大)
         """
         try:
-            orderbook = await self.get_orderbook(symbol, depth)
-            if not orderbook['bids'] or not orderbook['asks']:
+            orderbook = await self.get_orderbook_np(symbol, depth)
+            bids = orderbook['bids']
+            asks = orderbook['asks']
+            if not bids.size or not asks.size:
                 return {}
             
             # 计算买单和卖单的总量和总价值
-            bid_volume = sum(float(bid[1]) for bid in orderbook['bids'])
-            ask_volume = sum(float(ask[1]) for ask in orderbook['asks'])
+            bid_volume = float(bids[:, 1].sum())
+            ask_volume = float(asks[:, 1].sum())
             
-            bid_value = sum(float(bid[0]) * float(bid[1]) for bid in orderbook['bids'])
-            ask_value = sum(float(ask[0]) * float(ask[1]) for ask in orderbook['asks'])
+            bid_value = float(bids[:, 0].dot(bids[:, 1]))
+            ask_value = float(asks[:, 0].dot(asks[:, 1]))
             
             # 计算买卖价差
-            best_bid = float(orderbook['bids'][0][0])
-            best_ask = float(orderbook['asks'][0][0])
+            best_bid = float(bids[0, 0])
+            best_ask = float(asks[0, 0])
             spread = best_ask - best_bid
             mid_price = (best_bid + best_ask) / 2
             spread_percentage = (spread / mid_price) * 100
@@ -268,6 +383,39 @@ class BackpackClient:
             self.logger.error(f"分析市场深度失败: {str(e)}")
             return {}
     
+    async def stream_tickers(self, symbols: List[str]) -> AsyncIterator[Dict]:
+        """订阅 WebSocket 行情推送，连接断开或出错时结束
+        
+        Args:
+            symbols: 交易对符号列表
+            
+        Yields:
+            行情数据，包含：
+            - s: 交易对符号
+            - o/c/h/l: 24小时开盘价、最新价、最高价、最低价
+            - v/V: 24小时成交量、成交额
+            - n: 24小时成交笔数
+        """
+        try:
+            session = await self._get_session()
+            async with session.ws_connect(self.ws_url, heartbeat=30) as ws:
+                await ws.send_str(orjson.dumps({
+                    "method": "SUBSCRIBE",
+                    "params": [f"ticker.{symbol}" for symbol in symbols]
+                }).decode())
+                self.logger.info(f"已订阅 {len(symbols)} 个交易对的行情推送")
+                
+                async for msg in ws:
+                    if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                        data = orjson.loads(msg.data).get('data')
+                        if data:
+                            yield data
+                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                        self.logger.error(f"行情推送连接出错: {ws.exception()}")
+                        break
+        except Exception as e:
+            self.logger.error(f"订阅行情推送失败: {str(e)}")
+    
     async def get_traders(self, limit: int = 100) -> List[Dict]:
         """获取交易员列表
         
@@ -0,0 +1,19 @@
+import functools
+import os
+import yaml
+from typing import Dict
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           'config', 'config.yaml')
+
+@functools.lru_cache(maxsize=1)
+def load_config() -> Dict:
+    """读取 config/config.yaml，运行期间配置不变，只解析一次
+    
+    返回的字典在各调用方之间共用，不要修改
+    
+    Returns:
+        Dict: 完整的配置
+    """
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
@@ -0,0 +1,18 @@
+import aiohttp
+
+def create_connector() -> aiohttp.TCPConnector:
+    """创建 HTTP 连接池
+    
+    限制总连接数和单主机连接数，DNS 解析结果缓存 5 分钟，空闲连接保持 75 秒，
+    多个客户端可以共用同一个连接池以复用 TLS 连接。需要在事件循环中调用。
+    
+    Returns:
+        aiohttp.TCPConnector: 连接池
+    """
+    return aiohttp.TCPConnector(
+        limit=64,
+        limit_per_host=16,
+        ttl_dns_cache=300,
+        keepalive_timeout=75,
+        enable_cleanup_closed=True
+    )
@@ -1,25 +1,25 @@
 import aiohttp
 import asyncio
+import numpy as np
 from datetime import datetime, timedelta
-import yaml
-import os
 from typing import Dict, List, Optional
+from .config import load_config
+from .connector import create_connector
 
 class HyperliquidAPI:
-    def __init__(self):
-        self.config = self._load_config()
+    def __init__(self, connector: Optional[aiohttp.TCPConnector] = None):
+        self.config = load_config()
         self.base_url = self.config['api']['base_url']
         self.timeout = self.config['api']['timeout']
         self.session = None
-
-    def _load_config(self) -> Dict:
-        config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                                 'config', 'config.yaml')
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        self._connector = connector
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # 外部传入的连接池由调用方负责关闭
+        self.session = aiohttp.ClientSession(
+            connector=self._connector or create_connector(),
+            connector_owner=self._connector is None
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -53,7 +53,7 @@ class HyperliquidAPI:
 
     async def get_trader_performance(self, address: str, days: int = 7) -> Dict:
         """获取交易员表现数据"""
-        trades = await this.get_trader_trades(address, days)
+        trades = await self.get_trader_trades(address, days)
         
         if not trades:
             return {
@@ -64,24 +64,20 @@ class HyperliquidAPI:
                 "total_trades": 0
             }
 
-        # 计算胜率
-        winning_trades = sum(1 for trade in trades if trade['pnl'] > 0)
+        # 一次性取出盈亏和余额序列
         total_trades = len(trades)
-        win_rate = winning_trades / total_trades if total_trades > 0 else 0
+        pnls = np.fromiter((trade['pnl'] for trade in trades), dtype=np.float64, count=total_trades)
+        balances = np.fromiter((trade['balance'] for trade in trades), dtype=np.float64, count=total_trades)
+
+        # 计算胜率
+        win_rate = float((pnls > 0).mean())
 
         # 计算收益率
-        initial_balance = trades[0]['balance']
-        final_balance = trades[-1]['balance']
-        return_rate = (final_balance - initial_balance) / initial_balance
+        return_rate = float((balances[-1] - balances[0]) / balances[0])
 
-        # 计算最大回撤
-        max_drawdown = 0
-        peak = initial_balance
-        for trade in trades:
-            if trade['balance'] > peak:
-                peak = trade['balance']
-            drawdown = (peak - trade['balance']) / peak
-            max_drawdown = max(max_drawdown, drawdown)
+        # 计算最大回撤：相对历史最高余额的最大跌幅
+        peaks = np.maximum.accumulate(balances)
+        max_drawdown = float(((peaks - balances) / peaks).max())
 
         return {
             "address": address,
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+class AsyncTokenBucket:
+    """异步令牌桶限流器
+    
+    桶中最多保存 capacity 个令牌，按 refill_rate 个/秒的速度补充。
+    令牌充足时请求可以突发执行，不足时协程异步等待补充，不会阻塞事件循环。
+    """
+    
+    def __init__(self, capacity: float, refill_rate: float):
+        """初始化令牌桶
+        
+        Args:
+            capacity: 桶容量（最大突发请求数）
+            refill_rate: 每秒补充的令牌数
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    @classmethod
+    def per_minute(cls, requests_per_minute: float) -> "AsyncTokenBucket":
+        """按每分钟请求数创建令牌桶，桶容量为一分钟的请求数，允许短时间内突发
+        
+        Args:
+            requests_per_minute: 每分钟允许的请求数
+            
+        Returns:
+            AsyncTokenBucket: 令牌桶
+        """
+        return cls(capacity=requests_per_minute, refill_rate=requests_per_minute / 60)
+    
+    def _refill(self):
+        """按距上次补充经过的时间补充令牌
+        
+        只取一次单调时钟，令牌数和补充时间一起更新；单调时钟不受系统时间调整影响
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+    
+    async def acquire(self, cost: float = 1.0):
+        """获取令牌，令牌不足时等待
+        
+        Args:
+            cost: 本次请求消耗的令牌数
+        """
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((cost - self.tokens) / self.refill_rate)
+    
+    def penalize(self, seconds: float):
+        """被服务端限流（如 HTTP 429）时清空令牌并额外欠下 seconds 秒的令牌
+        
+        令牌数变为负值，之后的请求需要等待令牌补充回正数才能继续
+        
+        Args:
+            seconds: 额外冷却的秒数
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.refill_rate
@@ -0,0 +1,26 @@
+import os
+import sys
+import pytest
+import pytest_asyncio
+
+# 测试脚本按 src 目录下的包名导入（api、data、analysis）
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.backpack_client import BackpackClient
+from data.data_store import DataStore
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    """整个测试会话共用一个客户端，连接池和 keep-alive 连接在各测试间复用
+    
+    获取不到市场列表（如无网络）时跳过所有依赖客户端的测试，避免不做任何校验却显示通过
+    """
+    async with BackpackClient() as client:
+        if not await client.get_markets():
+            pytest.skip("无法获取 Backpack 市场列表")
+        yield client
+
+@pytest.fixture
+def data_store(tmp_path):
+    """写入临时目录的数据存储，测试不会改动仓库中的 data 目录"""
+    return DataStore(str(tmp_path))
@@ -1,38 +1,49 @@
 import os
-import json
 import logging
+import mmap
+import orjson
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
+
+MMAP_THRESHOLD = 64 * 1024  # 超过该大小的文件通过 mmap 读取
 
 class DataStore:
     """数据存储类，用于保存和管理 API 数据"""
     
-    def __init__(self, base_dir: str = "data"):
+    def __init__(self, base_dir: str = "data", cache_size: int = 4096):
         """初始化数据存储
         
         Args:
             base_dir: 数据存储的基础目录
+            cache_size: 内存中最多缓存的数据条数
+            
+        Note:
+            缓存直接保存数据对象，load_* 命中缓存时返回的是同一个对象；
+            调用方不得修改保存后或加载得到的数据，需要修改时先复制
         """
         self.base_dir = base_dir
         self.logger = logging.getLogger(__name__)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Tuple[str, str], Union[Dict, List]] = OrderedDict()
+        # 保存和加载可能在多个线程中执行（asyncio.to_thread），缓存操作需要加锁
+        self._cache_lock = threading.Lock()
+        
+        # 各数据类型的目录只拼接一次
+        self._type_dirs = {
+            data_type: os.path.join(base_dir, data_type)
+            for data_type in ("markets", "traders", "trades", "klines")
+        }
         
         # 创建必要的目录
         self._create_directories()
     
     def _create_directories(self):
         """创建必要的目录结构"""
-        directories = [
-            self.base_dir,
-            os.path.join(self.base_dir, "markets"),
-            os.path.join(self.base_dir, "traders"),
-            os.path.join(self.base_dir, "trades"),
-            os.path.join(self.base_dir, "klines")
-        ]
-        
-        for directory in directories:
-            if not os.path.exists(directory):
-                os.makedirs(directory)
-                self.logger.info(f"创建目录: {directory}")
+        # makedirs 会同时创建基础目录，已存在时直接跳过
+        for directory in self._type_dirs.values():
+            os.makedirs(directory, exist_ok=True)
     
     def _get_file_path(self, data_type: str, identifier: str) -> str:
         """获取数据文件的路径
@@ -44,7 +55,37 @@ class DataStore:
         Returns:
             str: 数据文件的完整路径
         """
-        return os.path.join(self.base_dir, data_type, f"{identifier}.json")
+        return f"{self._type_dirs[data_type]}{os.sep}{identifier}.json"
+    
+    def _cache_put(self, key: Tuple[str, str], data: Union[Dict, List]):
+        """写入内存缓存，超出容量时淘汰最久未使用的条目"""
+        with self._cache_lock:
+            self._cache[key] = data
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def _write(self, data_type: str, identifier: str, data: Union[Dict, List], timestamp: datetime) -> str:
+        """序列化数据并写入文件，同时更新内存缓存
+        
+        Args:
+            data_type: 数据类型
+            identifier: 数据标识符
+            data: 要保存的数据
+            timestamp: 保存时间
+            
+        Returns:
+            str: 数据文件的完整路径
+        """
+        file_path = self._get_file_path(data_type, identifier)
+        
+        # 紧凑格式写入，不做缩进；orjson 直接序列化 datetime 为 ISO 格式
+        payload = orjson.dumps({"timestamp": timestamp, "data": data}, option=orjson.OPT_NON_STR_KEYS)
+        with open(file_path, 'wb') as f:
+            f.write(payload)
+        
+        self._cache_put((data_type, identifier), data)
+        return file_path
     
     def save_data(self, data_type: str, identifier: str, data: Union[Dict, List]) -> bool:
         """保存数据到文件
@@ -58,23 +99,50 @@ class DataStore:
             bool: 是否保存成功
         """
         try:
-            file_path = self._get_file_path(data_type, identifier)
-            
-            # 添加时间戳
-            data_with_timestamp = {
-                "timestamp": datetime.now().isoformat(),
-                "data": data
-            }
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data_with_timestamp, f, ensure_ascii=False, indent=2)
-            
+            file_path = self._write(data_type, identifier, data, datetime.now())
             self.logger.info(f"数据已保存到: {file_path}")
             return True
         except Exception as e:
             self.logger.error(f"保存数据失败: {str(e)}")
             return False
     
+    def save_data_bulk(self, data_type: str, items: Dict[str, Union[Dict, List]]) -> Dict[str, Union[Dict, List]]:
+        """批量保存同一类型的数据，共用一个时间戳并只输出一条日志
+        
+        Args:
+            data_type: 数据类型
+            items: 数据标识符到数据的映射
+            
+        Returns:
+            Dict[str, Union[Dict, List]]: 保存成功的数据，可直接用于校验而无需重新读取
+        """
+        saved = {}
+        timestamp = datetime.now()
+        for identifier, data in items.items():
+            try:
+                self._write(data_type, identifier, data, timestamp)
+                saved[identifier] = data
+            except Exception as e:
+                self.logger.error(f"保存数据失败: {identifier}, {str(e)}")
+        
+        self.logger.info(f"已保存 {len(saved)}/{len(items)} 条数据到: {self._type_dirs[data_type]}")
+        return saved
+    
+    def file_size(self, data_type: str, identifier: str) -> Optional[int]:
+        """获取数据文件的大小，不读取文件内容
+        
+        Args:
+            data_type: 数据类型
+            identifier: 数据标识符
+            
+        Returns:
+            Optional[int]: 文件大小（字节），文件不存在时返回 None
+        """
+        try:
+            return os.stat(self._get_file_path(data_type, identifier)).st_size
+        except FileNotFoundError:
+            return None
+    
     def load_data(self, data_type: str, identifier: str) -> Optional[Union[Dict, List]]:
         """从文件加载数据
         
@@ -85,6 +153,13 @@ class DataStore:
         Returns:
             Optional[Union[Dict, List]]: 加载的数据，如果加载失败则返回 None
         """
+        key = (data_type, identifier)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        
         try:
             file_path = self._get_file_path(data_type, identifier)
             
@@ -92,11 +167,20 @@ class DataStore:
                 self.logger.warning(f"数据文件不存在: {file_path}")
                 return None
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                # 大文件（如长周期K线）直接映射页缓存解析，省去一次用户态拷贝
+                if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        with memoryview(mm) as view:
+                            data = orjson.loads(view)
+                else:
+                    data = orjson.loads(f.read())
             
             self.logger.info(f"数据已从 {file_path} 加载")
-            return data.get("data")
+            data = data.get("data")
+            if data is not None:
+                self._cache_put(key, data)
+            return data
         except Exception as e:
             self.logger.error(f"加载数据失败: {str(e)}")
             return None
@@ -113,6 +197,17 @@ class DataStore:
         """
         return self.save_data("markets", symbol, data)
     
+    def save_market_data_bulk(self, markets: Dict[str, Dict]) -> Dict[str, Dict]:
+        """批量保存市场数据
+        
+        Args:
+            markets: 市场符号到市场数据的映射
+            
+        Returns:
+            Dict[str, Dict]: 保存成功的市场数据
+        """
+        return self.save_data_bulk("markets", markets)
+    
     def load_market_data(self, symbol: str) -> Optional[Dict]:
         """加载市场数据
         
@@ -184,6 +279,18 @@ class DataStore:
         identifier = f"{symbol}_{interval}"
         return self.save_data("klines", identifier, data)
     
+    def kline_file_size(self, symbol: str, interval: str) -> Optional[int]:
+        """获取K线数据文件的大小
+        
+        Args:
+            symbol: 市场符号
+            interval: K线间隔
+            
+        Returns:
+            Optional[int]: 文件大小（字节），文件不存在时返回 None
+        """
+        return self.file_size("klines", f"{symbol}_{interval}")
+    
     def load_kline_data(self, symbol: str, interval: str) -> Optional[List[Dict]]:
         """加载K线数据
         
@@ -1,4 +1,4 @@
-import os
+import logging
 import sys
 from pathlib import Path
 
@@ -6,23 +6,17 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-print("正在启动服务器...")
-print(f"项目根目录: {project_root}")
+logger = logging.getLogger(__name__)
 
 try:
-    from web.main import app
-    print("成功导入app")
+    from web.main import app, run_server, setup_logging
 except Exception as e:
-    print(f"导入app时出错: {e}")
+    logging.basicConfig()
+    logger.error(f"导入app时出错: {str(e)}")
     sys.exit(1)
 
 if __name__ == "__main__":
-    print("开始运行服务器...")
-    import uvicorn
-    uvicorn.run(
-        "web.main:app",
-        host="127.0.0.1",
-        port=8000,
-        log_level="debug",
-        reload=True
-    ) 
\ No newline at end of file
+    setup_logging()
+    logger.info(f"项目根目录: {project_root}")
+    logger.info("开始运行服务器...")
+    run_server("web.main:app")
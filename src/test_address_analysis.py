@@ -1,8 +1,11 @@
 import asyncio
 import logging
+import math
+import statistics
+import pytest
 from api.backpack_client import BackpackClient
-from data.data_store import DataStore
 from analysis.address_analysis import AddressAnalysis
+from runner import run
 
 # 配置日志
 logging.basicConfig(
@@ -11,10 +14,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def test_address_analysis():
+async def test_address_analysis(client: BackpackClient):
     """测试地址分析功能"""
-    client = BackpackClient()
-    data_store = DataStore()
     analyzer = AddressAnalysis()
     
     # 1. 获取市场数据
@@ -26,20 +27,25 @@ async def test_address_analysis():
     
     logger.info(f"获取到 {len(markets)} 个市场")
     
-    # 2. 获取前3个市场的交易数据
+    # 2. 并发获取前3个市场的交易数据
+    symbols = [market['symbol'] for market in markets[:3] if market.get('symbol')]
+    logger.info(f"\n正在获取市场 {', '.join(symbols)} 的交易数据...")
+    results = await asyncio.gather(
+        *[client.get_trades(symbol, limit=100) for symbol in symbols],
+        return_exceptions=True
+    )
+    
     all_trades = []
-    for i, market in enumerate(markets[:3]):
-        symbol = market.get('symbol')
-        if symbol:
-            logger.info(f"\n正在获取市场 {symbol} 的交易数据...")
-            trades = await client.get_trades(symbol, limit=100)
-            if trades:
-                logger.info(f"获取到 {len(trades)} 条交易记录")
-                # 打印第一条交易记录的结构
-                if trades:
-                    logger.info("\n交易记录结构示例:")
-                    logger.info(trades[0])
-                all_trades.extend(trades)
+    for symbol, trades in zip(symbols, results):
+        if isinstance(trades, Exception):
+            logger.error(f"获取市场 {symbol} 的交易数据失败: {str(trades)}")
+            continue
+        if trades:
+            logger.info(f"市场 {symbol} 获取到 {len(trades)} 条交易记录")
+            # 打印第一条交易记录的结构
+            logger.info("\n交易记录结构示例:")
+            logger.info(trades[0])
+            all_trades.extend(trades)
     
     if not all_trades:
         logger.error("未获取到任何交易数据")
@@ -87,5 +93,60 @@ async def test_address_analysis():
             logger.info(f"最常交易的交易对: {symbol_dist['most_traded_symbol']}")
             logger.info(f"最盈利的交易对: {symbol_dist['most_profitable_symbol']}")
 
+def test_max_drawdown():
+    """最大回撤按累计盈亏的峰谷差计算，与盈亏同单位"""
+    analyzer = AddressAnalysis()
+    assert analyzer._calculate_max_drawdown([]) == 0.0
+    assert analyzer._calculate_max_drawdown([-50, 100]) == 0.0
+    assert analyzer._calculate_max_drawdown([100, -50, 30]) == 50.0
+    assert analyzer._calculate_max_drawdown([10, -30, 5, -10, 40]) == 35.0
+
+def test_address_metrics():
+    """按地址统计的各项指标，非有限的盈利按 0 计入且不算盈利"""
+    profits = [10, -4, float('nan'), 6]
+    trades = [
+        {'address': 'A', 'symbol': 'SOL_USDC', 'profit': p, 'timestamp': i * 3600 * 1000}
+        for i, p in enumerate(profits)
+    ]
+    trades.append({'address': 'B', 'symbol': 'SOL_USDC', 'profit': 1, 'timestamp': 0})
+    
+    result = AddressAnalysis().analyze_trades(trades, 'A')
+    assert result['total_trades'] == 4
+    assert result['win_rate'] == 0.5
+    assert result['total_profit'] == 16
+    assert result['total_loss'] == -4
+    assert result['max_profit'] == 10
+    assert result['max_loss'] == -4
+    assert result['profit_factor'] == 4
+    assert result['max_drawdown'] == 4
+    
+    cleaned = [10, -4, 0, 6]
+    expected_sharpe = (statistics.mean(cleaned) - 0.02 / 252) / statistics.stdev(cleaned) * math.sqrt(252)
+    assert result['sharpe_ratio'] == pytest.approx(expected_sharpe)
+
+def test_reported_profits_keep_precision():
+    """汇总和最大值按 float64 计算，输出值不带 float32 舍入误差"""
+    trades = [
+        {'address': 'A', 'symbol': 'SOL_USDC', 'profit': p, 'timestamp': i}
+        for i, p in enumerate([0.0599, 0.0601, 123456.78])
+    ]
+    result = AddressAnalysis().analyze_trades(trades, 'A')
+    assert result['max_profit'] == 123456.78
+    assert result['total_profit'] == 0.0599 + 0.0601 + 123456.78
+
+def test_sharpe_ratio():
+    """夏普比率使用样本标准差，样本不足或无波动时为 0"""
+    analyzer = AddressAnalysis()
+    returns = [0.01, 0.02, -0.01, 0.005]
+    expected = (statistics.mean(returns) - 0.02 / 252) / statistics.stdev(returns) * math.sqrt(252)
+    assert analyzer._calculate_sharpe_ratio(returns) == pytest.approx(expected)
+    assert analyzer._calculate_sharpe_ratio([0.01]) == 0.0
+    assert analyzer._calculate_sharpe_ratio([0.01, 0.01, 0.01]) == 0.0
+
+async def main():
+    """单独运行脚本时创建客户端"""
+    async with BackpackClient() as client:
+        await test_address_analysis(client)
+
 if __name__ == "__main__":
-    asyncio.run(test_address_analysis()) 
\ No newline at end of file
+    run(main())
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.api.backpack_client import BackpackClient
 from src.analysis.trader_analysis import TraderAnalysis
+from src.runner import run
 
 # 配置日志
 logging.basicConfig(
@@ -18,21 +19,22 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 def print_data_structure(data: dict, prefix: str = ""):
-    """打印数据结构"""
+    """打印数据结构（仅在 DEBUG 级别输出）"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     if isinstance(data, dict):
         for key, value in data.items():
             if isinstance(value, (dict, list)):
-                logger.info(f"{prefix}{key}:")
+                logger.debug(f"{prefix}{key}:")
                 print_data_structure(value, prefix + "  ")
             else:
-                logger.info(f"{prefix}{key}: {type(value).__name__}")
+                logger.debug(f"{prefix}{key}: {type(value).__name__}")
     elif isinstance(data, list) and data:
-        logger.info(f"{prefix}List of {len(data)} items")
+        logger.debug(f"{prefix}List of {len(data)} items")
         print_data_structure(data[0], prefix + "  ")
 
-async def test_backpack_analysis():
+async def test_backpack_analysis(client: BackpackClient):
     """测试 Backpack 分析功能"""
-    client = BackpackClient()
     analyzer = TraderAnalysis()
     
     try:
@@ -46,13 +48,17 @@ async def test_backpack_analysis():
             symbol = markets[0]['symbol']
             logger.info(f"分析市场: {symbol}")
             
-            # 获取交易历史
-            logger.info("获取交易历史...")
-            trades = await client.get_trades(symbol)
+            # 并发获取交易历史和K线数据
+            logger.info("获取交易历史和K线数据...")
+            trades, klines = await asyncio.gather(
+                client.get_trades(symbol),
+                client.get_klines(symbol)
+            )
+            
             if trades:
                 logger.info(f"获取到 {len(trades)} 条交易记录")
                 # 打印第一条交易记录的结构
-                logger.info("交易记录数据结构:")
+                logger.debug("交易记录数据结构:")
                 print_data_structure(trades[0])
                 # 分析交易数据
                 trade_analysis = analyzer.analyze_trades(trades)
@@ -60,13 +66,10 @@ async def test_backpack_analysis():
             else:
                 logger.warning("未获取到交易记录")
             
-            # 获取K线数据
-            logger.info("获取K线数据...")
-            klines = await client.get_klines(symbol)
             if klines:
                 logger.info(f"获取到 {len(klines)} 条K线数据")
                 # 打印第一条K线数据的结构
-                logger.info("K线数据结构:")
+                logger.debug("K线数据结构:")
                 print_data_structure(klines[0])
             else:
                 logger.warning("未获取到K线数据")
@@ -79,7 +82,8 @@ async def test_backpack_analysis():
 async def main():
     """主测试函数"""
     logger.info("开始测试 Backpack 分析功能...")
-    await test_backpack_analysis()
+    async with BackpackClient() as client:
+        await test_backpack_analysis(client)
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    run(main()) 
\ No newline at end of file
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 from api.backpack_client import BackpackClient
+from runner import run
 
 # 配置日志
 logging.basicConfig(
@@ -9,9 +10,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def explore_api():
+async def test_explore_api(client: BackpackClient):
     """探索 Backpack API 的功能"""
-    client = BackpackClient()
     
     # 1. 获取市场信息
     logger.info("正在获取市场信息...")
@@ -35,31 +35,31 @@ async def explore_api():
     if traders:
         trader_id = traders[0].get('id')
         if trader_id:
-            logger.info(f"\n正在获取交易员 {trader_id} 的详细信息...")
-            trader_info = await client.get_trader_info(trader_id)
+            # 四项信息互不依赖，并发获取
+            logger.info(f"\n正在获取交易员 {trader_id} 的详细信息、交易历史、持仓和资金信息...")
+            trader_info, trades, positions, balance = await asyncio.gather(
+                client.get_trader_info(trader_id),
+                client.get_trader_trades(trader_id, limit=10),
+                client.get_trader_positions(trader_id),
+                client.get_trader_balance(trader_id)
+            )
             logger.info(f"交易员信息: {trader_info}")
             
-            # 获取交易员的交易历史
-            logger.info(f"\n正在获取交易员 {trader_id} 的交易历史...")
-            trades = await client.get_trader_trades(trader_id, limit=10)
+            # 交易员的交易历史
             if trades:
                 logger.info(f"获取到 {len(trades)} 条交易记录")
                 # 打印前3条交易记录
                 for trade in trades[:3]:
                     logger.info(f"交易: {trade}")
             
-            # 获取交易员的持仓信息
-            logger.info(f"\n正在获取交易员 {trader_id} 的持仓信息...")
-            positions = await client.get_trader_positions(trader_id)
+            # 交易员的持仓信息
             if positions:
                 logger.info(f"获取到 {len(positions)} 个持仓")
                 # 打印所有持仓信息
                 for position in positions:
                     logger.info(f"持仓: {position}")
             
-            # 获取交易员的资金信息
-            logger.info(f"\n正在获取交易员 {trader_id} 的资金信息...")
-            balance = await client.get_trader_balance(trader_id)
+            # 交易员的资金信息
             if balance:
                 logger.info(f"资金信息: {balance}")
     
@@ -87,5 +87,10 @@ async def explore_api():
                 for kline in klines[:3]:
                     logger.info(f"K线: {kline}")
 
+async def main():
+    """单独运行脚本时创建客户端"""
+    async with BackpackClient() as client:
+        await test_explore_api(client)
+
 if __name__ == "__main__":
-    asyncio.run(explore_api()) 
\ No newline at end of file
+    run(main())
@@ -1,7 +1,10 @@
 import asyncio
 import logging
+import os
+from typing import Dict, List
 from api.backpack_client import BackpackClient
 from data.data_store import DataStore
+from runner import run
 
 # 配置日志
 logging.basicConfig(
@@ -10,85 +13,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def test_data_store():
+# 默认只检查保存结果和文件大小（pytest 中写入全新的临时目录），设置 DATA_STORE_FULL_VERIFY=1 时重新读取文件完整校验
+FULL_VERIFY = os.environ.get("DATA_STORE_FULL_VERIFY") == "1"
+
+async def test_data_store(client: BackpackClient, data_store: DataStore):
     """测试数据存储功能"""
-    client = BackpackClient()
-    data_store = DataStore()
+    # 完整校验用不带缓存的新实例读取，确保数据来自磁盘而不是内存缓存
+    verify_store = DataStore(data_store.base_dir, cache_size=0) if FULL_VERIFY else None
+    # 文件读写放到线程中执行，与其他市场的网络请求重叠，不阻塞事件循环
+    async def fetch_and_save_trades(symbol: str):
+        trades = await client.get_trades(symbol, limit=10)
+        if trades:
+            logger.info(f"获取到 {len(trades)} 条交易记录")
+            logger.info(f"保存交易数据: {symbol}")
+            assert await asyncio.to_thread(data_store.save_trade_data, symbol, trades)
+            assert data_store.file_size("trades", symbol)
+            
+            if FULL_VERIFY:
+                # 完整校验：重新读取文件并比对条数
+                loaded_data = await asyncio.to_thread(verify_store.load_trade_data, symbol)
+                assert loaded_data is not None and len(loaded_data) == len(trades)
+                logger.info(f"成功加载交易数据: {symbol}")
+            logger.info(f"数据条数: {len(trades)}")
+    
+    async def save_klines(symbol: str, interval: str, klines: List[Dict]):
+        if klines:
+            logger.info(f"获取到 {len(klines)} 条K线数据")
+            logger.info(f"保存K线数据: {symbol}, 间隔: {interval}")
+            assert await asyncio.to_thread(data_store.save_kline_data, symbol, interval, klines)
+            assert data_store.kline_file_size(symbol, interval)
+            
+            if FULL_VERIFY:
+                # 完整校验：重新读取文件并比对条数
+                loaded_data = await asyncio.to_thread(verify_store.load_kline_data, symbol, interval)
+                assert loaded_data is not None and len(loaded_data) == len(klines)
+                logger.info(f"成功加载K线数据: {symbol}, 间隔: {interval}")
+            logger.info(f"数据条数: {len(klines)}")
+    
+    async def fetch_and_save_klines(symbol: str, interval: str):
+        klines = await client.get_klines(symbol, interval=interval, limit=10)
+        await save_klines(symbol, interval, klines)
     
     # 1. 获取并保存市场数据
     logger.info("正在获取市场数据...")
     markets = await client.get_markets()
     if markets:
         logger.info(f"获取到 {len(markets)} 个市场")
-        # 保存前5个市场的数据
-        for i, market in enumerate(markets[:5]):
-            symbol = market.get('symbol')
-            if symbol:
-                logger.info(f"保存市场数据: {symbol}")
-                data_store.save_market_data(symbol, market)
-                
-                # 加载并验证数据
-                loaded_data = data_store.load_market_data(symbol)
-                if loaded_data:
-                    logger.info(f"成功加载市场数据: {symbol}")
-                    logger.info(f"数据内容: {loaded_data}")
+        # 批量保存前5个市场的数据，直接用返回的数据校验，无需重新读取
+        saved = await asyncio.to_thread(
+            data_store.save_market_data_bulk,
+            {market['symbol']: market for market in markets[:5] if market.get('symbol')}
+        )
+        for symbol, market in saved.items():
+            logger.info(f"成功保存市场数据: {symbol}")
+            logger.info(f"数据内容: {market}")
     
-    # 2. 获取并保存交易数据
-    if markets and len(markets) > 0:
-        # 测试前3个市场
-        for i, market in enumerate(markets[:3]):
-            symbol = market.get('symbol')
-            if symbol:
-                logger.info(f"\n正在获取交易数据: {symbol}")
-                trades = await client.get_trades(symbol, limit=10)
-                if trades:
-                    logger.info(f"获取到 {len(trades)} 条交易记录")
-                    logger.info(f"保存交易数据: {symbol}")
-                    data_store.save_trade_data(symbol, trades)
-                    
-                    # 加载并验证数据
-                    loaded_data = data_store.load_trade_data(symbol)
-                    if loaded_data:
-                        logger.info(f"成功加载交易数据: {symbol}")
-                        logger.info(f"数据条数: {len(loaded_data)}")
+    # 2. 并发获取并保存交易数据
+    symbols = [market['symbol'] for market in (markets or [])[:3] if market.get('symbol')]
+    if symbols:
+        logger.info(f"\n正在获取交易数据: {', '.join(symbols)}")
+        await asyncio.gather(*(fetch_and_save_trades(symbol) for symbol in symbols))
     
-    # 3. 获取并保存K线数据
-    if markets and len(markets) > 0:
-        # 测试前3个市场
-        for i, market in enumerate(markets[:3]):
-            symbol = market.get('symbol')
-            if symbol:
-                logger.info(f"\n正在获取K线数据: {symbol}")
-                klines = await client.get_klines(symbol, interval="1h", limit=10)
-                if klines:
-                    logger.info(f"获取到 {len(klines)} 条K线数据")
-                    logger.info(f"保存K线数据: {symbol}")
-                    data_store.save_kline_data(symbol, "1h", klines)
-                    
-                    # 加载并验证数据
-                    loaded_data = data_store.load_kline_data(symbol, "1h")
-                    if loaded_data:
-                        logger.info(f"成功加载K线数据: {symbol}")
-                        logger.info(f"数据条数: {len(loaded_data)}")
+    # 3. 并发获取并保存K线数据
+    if symbols:
+        logger.info(f"\n正在获取K线数据: {', '.join(symbols)}")
+        await asyncio.gather(*(fetch_and_save_klines(symbol, "1h") for symbol in symbols))
     
-    # 4. 测试不同的K线间隔
-    if markets and len(markets) > 0:
-        symbol = markets[0].get('symbol')
-        if symbol:
-            intervals = ["1m", "5m", "15m", "1h", "4h", "1d"]
-            for interval in intervals:
-                logger.info(f"\n正在获取K线数据: {symbol}, 间隔: {interval}")
-                klines = await client.get_klines(symbol, interval=interval, limit=10)
-                if klines:
-                    logger.info(f"获取到 {len(klines)} 条K线数据")
-                    logger.info(f"保存K线数据: {symbol}, 间隔: {interval}")
-                    data_store.save_kline_data(symbol, interval, klines)
-                    
-                    # 加载并验证数据
-                    loaded_data = data_store.load_kline_data(symbol, interval)
-                    if loaded_data:
-                        logger.info(f"成功加载K线数据: {symbol}, 间隔: {interval}")
-                        logger.info(f"数据条数: {len(loaded_data)}")
+    # 4. 并发测试不同的K线间隔（1h 已在第 3 步保存）
+    if symbols:
+        symbol = symbols[0]
+        intervals = ["1m", "5m", "15m", "4h", "1d"]
+        logger.info(f"\n正在获取K线数据: {symbol}, 间隔: {', '.join(intervals)}")
+        klines_by_interval = await client.get_klines_multi(symbol, intervals, limit=10)
+        await asyncio.gather(*(
+            save_klines(symbol, interval, klines) for interval, klines in klines_by_interval.items()
+        ))
+
+async def main():
+    """单独运行脚本时创建客户端"""
+    # 限制同时进行的请求数，避免并发请求触发限流
+    async with BackpackClient(max_concurrency=10) as client:
+        await test_data_store(client, DataStore())
 
 if __name__ == "__main__":
-    asyncio.run(test_data_store()) 
\ No newline at end of file
+    run(main())
@@ -1,7 +1,12 @@
 import asyncio
 import logging
+import math
+import numpy as np
+import pytest
+from contextlib import aclosing
 from api.backpack_client import BackpackClient
 from analysis.market_analysis import MarketAnalysis
+from runner import run
 
 # 配置日志
 logging.basicConfig(
@@ -10,9 +15,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def test_market_analysis():
+TICKER_TIMEOUT = 30  # 等待实时行情推送的最长秒数
+
+# 各分析结果的日志模板，按字典键延迟格式化，每个部分只输出一条日志
+DEPTH_REPORT = "\n".join([
+    "\n市场深度分析:",
+    "买单总量: %(bid_volume).2f",
+    "卖单总量: %(ask_volume).2f",
+    "买单总价值: %(bid_value).2f USDC",
+    "卖单总价值: %(ask_value).2f USDC",
+    "买卖价差: %(spread).8f",
+    "买卖价差百分比: %(spread_percentage).2f%%",
+    "中间价格: %(mid_price).8f",
+    "买卖失衡程度: %(imbalance).2f"
+])
+
+TRADE_REPORT = "\n".join([
+    "\n交易分析:",
+    "总成交笔数: %(total_trades)d",
+    "总成交量: %(total_volume).2f",
+    "总成交额: %(total_value).2f USDC",
+    "平均成交量: %(avg_trade_size).2f",
+    "平均成交额: %(avg_trade_value).2f USDC",
+    "买单比例: %(buy_ratio).2f%%",
+    "价格趋势: %(price_trend)s",
+    "波动率: %(volatility).2f%%"
+])
+
+PRICE_REPORT = "\n".join([
+    "\n价格分析:",
+    "当前价格: %(current_price).8f",
+    "24小时价格变化: %(price_change_24h).8f",
+    "24小时价格变化百分比: %(price_change_percentage_24h).2f%%",
+    "24小时最高价: %(high_24h).8f",
+    "24小时最低价: %(low_24h).8f",
+    "24小时成交量: %(volume_24h).2f",
+    "7小时均价: %(ma7).8f",
+    "25小时均价: %(ma25).8f",
+    "RSI: %(rsi).2f",
+    "趋势: %(trend)s"
+])
+
+async def test_market_analysis(client: BackpackClient):
     """测试市场分析功能"""
-    client = BackpackClient()
     analyzer = MarketAnalysis(client)
     
     # 1. 查找活跃市场
@@ -23,55 +68,78 @@ async def test_market_analysis():
         logger.error("未找到活跃市场")
         return
     
-    logger.info(f"\n找到 {len(active_markets)} 个活跃市场")
+    logger.info("\n找到 %d 个活跃市场", len(active_markets))
     
-    # 2. 分析前3个最活跃的市场
-    for i, market in enumerate(active_markets[:3]):
-        symbol = market['symbol']
-        analysis = market['analysis']
-        
-        logger.info(f"\n市场 {i+1}: {symbol}")
-        
-        # 打印市场深度分析
-        depth = analysis.get('market_depth', {})
-        if depth:
-            logger.info("\n市场深度分析:")
-            logger.info(f"买单总量: {depth['bid_volume']:.2f}")
-            logger.info(f"卖单总量: {depth['ask_volume']:.2f}")
-            logger.info(f"买单总价值: {depth['bid_value']:.2f} USDC")
-            logger.info(f"卖单总价值: {depth['ask_value']:.2f} USDC")
-            logger.info(f"买卖价差: {depth['spread']:.8f}")
-            logger.info(f"买卖价差百分比: {depth['spread_percentage']:.2f}%")
-            logger.info(f"中间价格: {depth['mid_price']:.8f}")
-            logger.info(f"买卖失衡程度: {depth['imbalance']:.2f}")
-        
-        # 打印交易分析
-        trades = analysis.get('trade_analysis', {})
-        if trades:
-            logger.info("\n交易分析:")
-            logger.info(f"总成交笔数: {trades['total_trades']}")
-            logger.info(f"总成交量: {trades['total_volume']:.2f}")
-            logger.info(f"总成交额: {trades['total_value']:.2f} USDC")
-            logger.info(f"平均成交量: {trades['avg_trade_size']:.2f}")
-            logger.info(f"平均成交额: {trades['avg_trade_value']:.2f} USDC")
-            logger.info(f"买单比例: {trades['buy_ratio']:.2%}")
-            logger.info(f"价格趋势: {trades['price_trend']}")
-            logger.info(f"波动率: {trades['volatility']:.2%}")
+    # 2. 分析前3个最活跃的市场，INFO 日志关闭时跳过整段格式化
+    if logger.isEnabledFor(logging.INFO):
+        for i, market in enumerate(active_markets[:3]):
+            symbol = market['symbol']
+            analysis = market['analysis']
+            
+            logger.info("\n市场 %d: %s", i + 1, symbol)
+            
+            # 打印市场深度分析
+            depth = analysis.get('market_depth', {})
+            if depth:
+                logger.info(DEPTH_REPORT, depth)
+            
+            # 打印交易分析，比例换算为百分数
+            trades = analysis.get('trade_analysis', {})
+            if trades:
+                logger.info(TRADE_REPORT, {
+                    **trades,
+                    'buy_ratio': trades['buy_ratio'] * 100,
+                    'volatility': trades['volatility'] * 100
+                })
+            
+            # 打印价格分析
+            price = analysis.get('price_analysis', {})
+            if price:
+                logger.info(PRICE_REPORT, price)
+    
+    # 3. 订阅前3个活跃市场的实时行情，由服务端推送而不是重复轮询
+    symbols = [market['symbol'] for market in active_markets[:3]]
+    logger.info("\n正在订阅实时行情: %s", ', '.join(symbols))
+    # 订阅被拒绝或长时间没有推送时不会收到任何行情，超时后结束等待
+    received = 0
+    async with aclosing(client.stream_tickers(symbols)) as tickers:
+        async def consume():
+            nonlocal received
+            async for ticker in tickers:
+                logger.info("%s 最新价: %s, 24小时成交笔数: %s", ticker.get('s'), ticker.get('c'), ticker.get('n'))
+                received += 1
+                if received >= 10:
+                    return
         
-        # 打印价格分析
-        price = analysis.get('price_analysis', {})
-        if price:
-            logger.info("\n价格分析:")
-            logger.info(f"当前价格: {price['current_price']:.8f}")
-            logger.info(f"24小时价格变化: {price['price_change_24h']:.8f}")
-            logger.info(f"24小时价格变化百分比: {price['price_change_percentage_24h']:.2f}%")
-            logger.info(f"24小时最高价: {price['high_24h']:.8f}")
-            logger.info(f"24小时最低价: {price['low_24h']:.8f}")
-            logger.info(f"24小时成交量: {price['volume_24h']:.2f}")
-            logger.info(f"7小时均价: {price['ma7']:.8f}")
-            logger.info(f"25小时均价: {price['ma25']:.8f}")
-            logger.info(f"RSI: {price['rsi']:.2f}")
-            logger.info(f"趋势: {price['trend']}")
+        try:
+            await asyncio.wait_for(consume(), TICKER_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("等待实时行情超时，共收到 %d 条", received)
+    assert received > 0, f"{TICKER_TIMEOUT} 秒内未收到实时行情"
+
+def _reference_rsi(close, period=14):
+    """逐项按定义计算的 Wilder RSI，用于校验 numba 内核"""
+    deltas = [b - a for a, b in zip(close, close[1:])]
+    avg_gain = sum(max(d, 0) for d in deltas[:period]) / period
+    avg_loss = sum(max(-d, 0) for d in deltas[:period]) / period
+    for d in deltas[period:]:
+        avg_gain = (avg_gain * (period - 1) + max(d, 0)) / period
+        avg_loss = (avg_loss * (period - 1) + max(-d, 0)) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+def test_rsi():
+    """Wilder RSI 与按定义计算的结果一致，数据不足时为 NaN"""
+    analyzer = MarketAnalysis(None)
+    close = [44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10, 45.42, 45.84, 46.08,
+             45.89, 46.03, 45.61, 46.28, 46.28, 46.00, 46.03, 46.41, 46.22, 45.64]
+    assert analyzer._calculate_rsi(np.array(close)) == pytest.approx(_reference_rsi(close))
+    assert analyzer._calculate_rsi(np.arange(1.0, 21.0)) == 100.0
+    assert math.isnan(analyzer._calculate_rsi(np.arange(1.0, 15.0)))
+
+async def main():
+    """单独运行脚本时创建客户端"""
+    async with BackpackClient() as client:
+        await test_market_analysis(client)
 
 if __name__ == "__main__":
-    asyncio.run(test_market_analysis()) 
\ No newline at end of file
+    run(main())
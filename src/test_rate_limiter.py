@@ -0,0 +1,51 @@
+import time
+from types import SimpleNamespace
+import pytest
+from api import rate_limiter
+from api.rate_limiter import AsyncTokenBucket
+
+@pytest.fixture
+def clock(monkeypatch):
+    """替换令牌桶使用的单调时钟，测试中手动推进"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def test_per_minute():
+    """按每分钟请求数创建的令牌桶容量为一分钟的请求数"""
+    bucket = AsyncTokenBucket.per_minute(120)
+    assert bucket.capacity == 120
+    assert bucket.refill_rate == 2
+
+async def test_burst_and_refill(clock):
+    """令牌充足时突发获取，补充的令牌不超过容量"""
+    bucket = AsyncTokenBucket(capacity=3, refill_rate=1)
+    for _ in range(3):
+        await bucket.acquire()
+    assert bucket.tokens == 0
+    
+    clock[0] += 2
+    bucket._refill()
+    assert bucket.tokens == 2
+    
+    clock[0] += 10
+    bucket._refill()
+    assert bucket.tokens == 3
+
+def test_penalize(clock):
+    """被限流后令牌变为负值，需要额外等待 seconds 秒才能恢复"""
+    bucket = AsyncTokenBucket(capacity=10, refill_rate=2)
+    bucket.penalize(5)
+    assert bucket.tokens == -10
+    
+    clock[0] += 5
+    bucket._refill()
+    assert bucket.tokens == 0
+
+async def test_acquire_waits_for_refill():
+    """令牌耗尽时异步等待补充"""
+    bucket = AsyncTokenBucket(capacity=1, refill_rate=50)
+    await bucket.acquire()
+    start = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.01
@@ -1,11 +1,113 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Set
+import asyncio
+import atexit
+import hashlib
+import logging
+import queue
+import orjson
 import uvicorn
+import sys
 import os
 
-app = FastAPI(title="Hyperliquid交易员分析系统")
+# 将 src 目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.backpack_client import BackpackClient
+from api.config import load_config
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5  # 行情推送断开后重连的等待秒数
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def setup_logging(level: int = logging.INFO):
+    """配置异步日志：记录日志只把日志记录放入队列，由后台线程写到标准错误
+    
+    请求处理路径上不会因为写终端而阻塞；低于 level 的日志在放入队列前就被丢弃。
+    以脚本运行时本文件会以 __main__ 和 main 两个模块各导入一次，因此按根日志器上
+    是否已有 QueueHandler 判断，重复调用只更新日志级别。
+    
+    Args:
+        level: 根日志级别
+    """
+    root = logging.getLogger()
+    root.setLevel(level)
+    if any(isinstance(handler, QueueHandler) for handler in root.handlers):
+        return
+    
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    # 进程退出前写完队列中剩余的日志
+    atexit.register(listener.stop)
+
+# 已连接的浏览器 WebSocket
+subscribers: Set[WebSocket] = set()
+
+# 上游行情转发任务，只在有浏览器连接时运行
+_relay: Optional[asyncio.Task] = None
+
+async def broadcast(message: str):
+    """把一条行情推送给所有已连接的浏览器，发送失败的连接直接移除"""
+    targets = list(subscribers)
+    results = await asyncio.gather(
+        *(websocket.send_text(message) for websocket in targets),
+        return_exceptions=True
+    )
+    for websocket, result in zip(targets, results):
+        if isinstance(result, Exception):
+            subscribers.discard(websocket)
+
+async def relay_tickers(client: BackpackClient):
+    """保持一条到 Backpack 的行情推送连接，把收到的行情转发给所有浏览器"""
+    while True:
+        markets = await client.get_markets()
+        symbols = [market['symbol'] for market in markets if market.get('symbol')]
+        if symbols:
+            async for ticker in client.stream_tickers(symbols):
+                if subscribers:
+                    await broadcast(orjson.dumps(ticker).decode())
+        logger.warning(f"行情推送已断开，{RECONNECT_DELAY} 秒后重连")
+        await asyncio.sleep(RECONNECT_DELAY)
+
+def start_relay(client: BackpackClient):
+    """第一个浏览器连接时建立上游行情推送，已在运行时不重复建立"""
+    global _relay
+    if _relay is None or _relay.done():
+        _relay = asyncio.create_task(relay_tickers(client))
+
+async def stop_relay():
+    """最后一个浏览器断开或服务关闭时断开上游行情推送"""
+    global _relay
+    if _relay is None:
+        return
+    relay, _relay = _relay, None
+    relay.cancel()
+    try:
+        await relay
+    except asyncio.CancelledError:
+        pass
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时配置日志并创建共用的 API 客户端，关闭时断开行情推送"""
+    # 每个 worker 进程各自配置日志
+    setup_logging(logging.DEBUG if load_config().get('server', {}).get('debug', False) else logging.INFO)
+    async with BackpackClient() as client:
+        app.state.client = client
+        yield
+        await stop_relay()
+
+app = FastAPI(title="Hyperliquid交易员分析系统", lifespan=lifespan)
 
 # 配置CORS
 app.add_middleware(
@@ -16,27 +118,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 挂载静态文件目录
-static_path = os.path.join(os.path.dirname(__file__), "static")
-app.mount("/static", StaticFiles(directory=static_path), name="static")
-
-@app.get("/")
-async def root():
-    """返回主页"""
-    print("访问主页")
-    return FileResponse(os.path.join(static_path, "index.html"))
+# 测试接口的响应是常量，启动时序列化一次；ETag 取内容摘要，内容变化时自动失效
+TEST_BODY = orjson.dumps({"message": "API is working"})
+TEST_ETAG = f'"{hashlib.md5(TEST_BODY).hexdigest()}"'
 
 @app.get("/api/test")
-async def test():
-    """测试API"""
-    return {"message": "API is working"}
+async def test(request: Request):
+    """测试API，客户端带上匹配的 If-None-Match 时返回 304"""
+    if_none_match = request.headers.get("if-none-match", "")
+    etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+    if TEST_ETAG in etags or "*" in etags:
+        return Response(status_code=304, headers={"ETag": TEST_ETAG})
+    return Response(TEST_BODY, media_type="application/json", headers={"ETag": TEST_ETAG})
+
+@app.websocket("/ws/markets")
+async def markets_ws(websocket: WebSocket):
+    """实时行情推送，所有浏览器共用一条上游连接"""
+    await websocket.accept()
+    subscribers.add(websocket)
+    start_relay(websocket.app.state.client)
+    try:
+        # 浏览器无需发送数据，这里只用于感知断开
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscribers.discard(websocket)
+        if not subscribers:
+            await stop_relay()
+
+# 静态文件（含主页 index.html）挂载在根路径，必须放在所有 API 路由之后；
+# StaticFiles 自动处理 ETag/Last-Modified，重复访问返回 304
+static_path = os.path.join(os.path.dirname(__file__), "static")
+app.mount("/", StaticFiles(directory=static_path, html=True), name="static")
+
+def run_server(app_path: str = "main:app"):
+    """按 config.yaml 的 server 配置启动服务器
+    
+    debug 为 true 时使用开发配置（热重载、debug 日志）；否则使用生产配置：
+    按 workers 配置启动 worker 进程（默认 1 个）、关闭访问日志，已安装 uvloop/httptools 时自动选用
+    
+    Args:
+        app_path: uvicorn 导入应用的路径
+    """
+    server = load_config().get('server', {})
+    host = server.get('host', '127.0.0.1')
+    port = server.get('port', 8000)
+    if server.get('debug', False):
+        uvicorn.run(app_path, host=host, port=port, log_level="debug", reload=True)
+    else:
+        uvicorn.run(
+            app_path,
+            host=host,
+            port=port,
+            log_level="warning",
+            workers=server.get('workers', 1),
+            loop="auto",
+            http="auto",
+            access_log=False
+        )
 
 if __name__ == "__main__":
-    print("启动服务器...")
-    uvicorn.run(
-        "main:app",
-        host="127.0.0.1",
-        port=8000,
-        log_level="debug",
-        reload=True
-    ) 
\ No newline at end of file
+    setup_logging()
+    logger.info("启动服务器...")
+    run_server()